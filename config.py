@@ -32,15 +32,21 @@ PUBLICATION_DELAY_INCREASE = 30  # Увеличение задержки в ми
 # Настройки перевода
 TARGET_LANGUAGE = 'ru'
 SUMMARY_LENGTH = 200  # символов
+TRANSLATION_BATCH_SIZE = 50  # Количество текстов в одном запросе к переводчику
+TRANSLATION_MAX_WORKERS = 4  # Максимальное количество одновременных запросов к переводчику
+TRANSLATION_CACHE_SIZE = 8192  # Максимальное количество переводов, хранимых в памяти
+PROCESSING_MAX_WORKERS = 8  # Количество потоков для категоризации и оценки переведенных статей
 
 # Настройки для срочных новостей
 BREAKING_NEWS_KEYWORDS = [
     "breaking", "срочно", "just announced", "world first", "revolutionary",
     "game-changing", "major acquisition", "critical vulnerability"
 ]
-PRIORITY_SOURCES = [
+# Ключевые слова, указывающие на важность или новизну
+IMPORTANCE_KEYWORDS = ["важно", "критично", "прорыв", "революционно", "впервые"]
+PRIORITY_SOURCES = (
     "techcrunch.com", "wired.com", "theverge.com", "artificialintelligence-news.com"
-]
+)
 MAX_BREAKING_NEWS_PER_HOUR = 3
 
 # Словарь категорий и эмодзи
@@ -74,14 +80,14 @@ category_emoji = {
 }
 
 # Приоритетные категории
-PRIORITY_CATEGORIES = [
+PRIORITY_CATEGORIES = frozenset([
     "инновации",
     "научные_публикации",
     "ии_и_нейросети",
     "кибербезопасность",
     "робототехника",
     "мобильные_устройства"
-]
+])
 
 # Обновленные веса категорий
 category_weights = {
@@ -149,12 +155,19 @@ category_keywords = {
 }
 
 # Черный список ключевых слов
-BLACKLIST_KEYWORDS = [
+BLACKLIST_KEYWORDS = (
     "скидка", "распродажа", "Prime Day", "Black Friday", "Cyber Monday",
     "сэкономить", "дешевле", "акция", "уценка", "бесплатно",
     "купить", "продажа", "цена снижена", "специальное предложение",
     "скидок", "выгодная цена", "выгодное предложение", "экономия"
-]
+)
+
+# Ключевые слова в нижнем регистре, чтобы не приводить их к нему при обработке каждой статьи
+category_keywords_lc = {cat: [keyword.lower() for keyword in keywords] for cat, keywords in category_keywords.items()}
+BLACKLIST_LC = tuple(word.lower() for word in BLACKLIST_KEYWORDS)
+BREAKING_LC = tuple(word.lower() for word in BREAKING_NEWS_KEYWORDS)
+PRIORITY_SOURCES_LC = tuple(source.lower() for source in PRIORITY_SOURCES)
+IMPORTANCE_LC = tuple(word.lower() for word in IMPORTANCE_KEYWORDS)
 
 # Загрузка конфиденциальных данных из переменных окружения
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
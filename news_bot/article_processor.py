@@ -1,27 +1,125 @@
+import hashlib
 import logging
-from typing import List, Dict, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime
 import re
 import random
+from collections import Counter, OrderedDict, defaultdict
+import ahocorasick
+import numpy as np
 from nltk.sentiment import SentimentIntensityAnalyzer
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-from googletrans import Translator
-from .database import get_today_events
-from .utils import clean_html, truncate_summary
+from sklearn.preprocessing import normalize
+from .database import (
+    get_today_events_cached, get_recent_translations, get_translations, add_translations, get_processed_articles, add_processed_articles
+)
+from .utils import truncate_summary, translate_texts
 from config import (
-    TARGET_LANGUAGE, SUMMARY_LENGTH,
-    BREAKING_NEWS_KEYWORDS, PRIORITY_SOURCES,
-    category_keywords, category_weights,
+    TARGET_LANGUAGE, SUMMARY_LENGTH, TRANSLATION_BATCH_SIZE, TRANSLATION_MAX_WORKERS, TRANSLATION_CACHE_SIZE,
+    PROCESSING_MAX_WORKERS,
+    category_keywords, category_keywords_lc, category_weights,
     TOP_ARTICLES_PERCENTAGE, PRIORITY_CATEGORIES,
-    BLACKLIST_KEYWORDS
+    BLACKLIST_LC, BREAKING_LC, PRIORITY_SOURCES_LC, IMPORTANCE_LC
 )
 
 logger = logging.getLogger(__name__)
 
 # Инициализация необходимых объектов
 sia = SentimentIntensityAnalyzer()
-translator = Translator()
+
+# Кэш переводов {хэш текста: перевод} на TRANSLATION_CACHE_SIZE записей с вытеснением давно не используемых;
+# полный набор переводов хранится в таблице translations
+translation_cache: "OrderedDict[str, str]" = OrderedDict()
+translation_cache_lock = threading.Lock()
+
+# Пулы потоков живут все время работы бота: клиенты googletrans и соединения с базой данных
+# хранятся по одному на поток и переиспользуются между циклами, а не создаются заново
+translation_executor = ThreadPoolExecutor(max_workers=TRANSLATION_MAX_WORKERS, thread_name_prefix='translation')
+processing_executor = ThreadPoolExecutor(max_workers=PROCESSING_MAX_WORKERS, thread_name_prefix='processing')
+
+# Служебные метки для ключевых слов, не относящихся к категориям
+BLACKLIST_TAG = '_blacklist'
+BREAKING_TAG = '_breaking'
+IMPORTANCE_TAG = '_importance'
+
+
+def build_keyword_index() -> Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]]:
+    """
+    Строит обратный индекс ключевых слов: категорий, черного списка, срочных новостей и слов важности.
+
+    Returns:
+        Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]]: Словарь
+            {ключевое слово: (категории, служебные метки)}.
+    """
+    keyword_categories = {}
+    for cat, keywords in category_keywords_lc.items():
+        for keyword in keywords:
+            keyword_categories.setdefault(keyword, set()).add(cat)
+
+    keyword_flags = {}
+    for tag, keywords in ((BLACKLIST_TAG, BLACKLIST_LC),
+                          (BREAKING_TAG, BREAKING_LC),
+                          (IMPORTANCE_TAG, IMPORTANCE_LC)):
+        for keyword in keywords:
+            keyword_flags.setdefault(keyword, set()).add(tag)
+
+    return {
+        keyword: (tuple(keyword_categories.get(keyword, ())), tuple(keyword_flags.get(keyword, ())))
+        for keyword in keyword_categories.keys() | keyword_flags.keys()
+    }
+
+
+def build_keyword_automaton(index: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]]) -> ahocorasick.Automaton:
+    """
+    Строит автомат Ахо-Корасик по обратному индексу ключевых слов.
+
+    Args:
+        index (Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]]): Индекс, построенный build_keyword_index.
+
+    Returns:
+        ahocorasick.Automaton: Автомат, значением каждого слова является запись индекса (категории, служебные метки).
+    """
+    automaton = ahocorasick.Automaton()
+    for keyword, entry in index.items():
+        automaton.add_word(keyword, entry)
+    automaton.make_automaton()
+    return automaton
+
+
+# Один автомат на все ключевые слова: текст статьи просматривается за один проход,
+# а каждое совпадение сразу дает категории и метки слова
+keyword_index = build_keyword_index()
+keyword_automaton = build_keyword_automaton(keyword_index)
+
+# Порядок категорий в конфигурации: при равном числе совпадений выбирается категория, указанная раньше
+CATEGORY_ORDER = {cat: i for i, cat in enumerate(category_keywords)}
+
+# Источники сверяются с URL фида одним регулярным выражением
+PRIORITY_SOURCES_RE = re.compile('|'.join(map(re.escape, PRIORITY_SOURCES_LC)))
+
+# Векторизатор без состояния для сравнения статей: не требует обучения словаря при каждом вызове
+diversity_vectorizer = HashingVectorizer(n_features=2 ** 18, alternate_sign=False, norm='l2')
+
+
+def scan_keywords(content_lc: str) -> Tuple[Counter, Set[str]]:
+    """
+    Находит ключевые слова в тексте за один проход автомата.
+
+    Args:
+        content_lc (str): Текст в нижнем регистре.
+
+    Returns:
+        Tuple[Counter, Set[str]]: Количество совпадений по категориям и служебные метки найденных слов.
+    """
+    category_scores = Counter()
+    flags = set()
+    for _, (categories, keyword_flags) in keyword_automaton.iter(content_lc):
+        category_scores.update(categories)
+        flags.update(keyword_flags)
+    return category_scores, flags
 
 
 def process_articles(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -34,184 +132,436 @@ def process_articles(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     Returns:
         List[Dict[str, Any]]: Список обработанных статей.
     """
+    # События дня одинаковы для всех статей, поэтому запрашиваются один раз на пакет
+    today_event_kws = get_today_event_keywords()
+
+    # Статьи, обработанные в прошлых циклах, восстанавливаются без перевода и анализа текста
+    try:
+        saved_states = get_processed_articles([article['id'] for article in articles])
+    except Exception as e:
+        logger.error(f"Ошибка при загрузке результатов обработки статей: {e}")
+        saved_states = {}
+
+    new_articles = [article for article in articles if article['id'] not in saved_states]
+    new_results, untranslated = translate_and_process(new_articles, today_event_kws)
+    processed_by_id = {article['id']: processed for article, processed in zip(new_articles, new_results)}
+
+    # Статьи, перевод которых не удался, не сохраняются: в следующем цикле их переведут заново
+    try:
+        add_processed_articles([(processed['id'], processed['pub_date'], get_article_state(processed))
+                                for index, processed in enumerate(new_results)
+                                if processed and index not in untranslated])
+    except Exception as e:
+        logger.error(f"Ошибка при сохранении результатов обработки статей: {e}")
+
     processed_articles = []
     for article in articles:
+        if article['id'] in saved_states:
+            processed = build_processed_article(article, saved_states[article['id']], today_event_kws)
+        else:
+            processed = processed_by_id.get(article['id'])
+        if processed:
+            processed_articles.append(processed)
+
+    # Составляющие оценки, не зависящие от текста, считаются сразу для всех статей
+    calculate_interest_scores(processed_articles)
+
+    logger.info(f"Обработано {len(processed_articles)} статей, из них {len(saved_states)} взяты из базы")
+    return processed_articles
+
+
+def translate_and_process(articles: List[Dict[str, Any]],
+                          today_event_kws: List[Set[str]]) -> Tuple[List[Optional[Dict[str, Any]]], Set[int]]:
+    """
+    Переводит и обрабатывает статьи.
+
+    Args:
+        articles (List[Dict[str, Any]]): Список необработанных статей.
+        today_event_kws (List[Set[str]]): Ключевые слова сегодняшних событий.
+
+    Returns:
+        Tuple[List[Optional[Dict[str, Any]]], Set[int]]: Обработанные статьи в том же порядке (None для статей
+        с ошибкой) и индексы статей, которые не удалось перевести и которые обработаны с исходным текстом.
+    """
+    # Статьи переводятся пакетами (по два текста на статью). Оценка статей пакета начинается,
+    # как только готов его перевод, пока остальные пакеты еще переводятся
+    articles_per_batch = max(TRANSLATION_BATCH_SIZE // 2, 1)
+    batch_starts = range(0, len(articles), articles_per_batch)
+
+    results = [None] * len(articles)
+    untranslated = set()
+    # Каждый пакет статей умещается в один запрос, поэтому translate_with_cache в потоке translation_executor
+    # не ставит задачи в тот же пул и не ждет их
+    translate_futures = {
+        translation_executor.submit(translate_articles, articles[start:start + articles_per_batch]): start
+        for start in batch_starts
+    }
+
+    process_futures = {}
+    for future in as_completed(translate_futures):
+        start = translate_futures[future]
+        for offset, (title, summary) in enumerate(future.result()):
+            index = start + offset
+            if title is None or summary is None:
+                untranslated.add(index)
+                title = articles[index]['title'] if title is None else title
+                summary = articles[index]['summary'] if summary is None else summary
+            process_future = processing_executor.submit(process_single_article, articles[index], title, summary,
+                                                        today_event_kws)
+            process_futures[process_future] = index
+
+    for future, index in process_futures.items():
         try:
-            processed = process_single_article(article)
-            if processed:
-                processed_articles.append(processed)
+            results[index] = future.result()
         except Exception as e:
-            logger.error(f"Ошибка при обработке статьи {article.get('title', 'Unknown')}: {e}")
+            logger.error(f"Ошибка при обработке статьи {articles[index].get('title', 'Unknown')}: {e}")
 
-    logger.info(f"Обработано {len(processed_articles)} статей")
-    return processed_articles
+    return results, untranslated
 
 
-def process_single_article(article: Dict[str, Any]) -> Dict[str, Any]:
+def is_priority_source(article: Dict[str, Any]) -> bool:
+    """
+    Проверяет, получена ли статья из приоритетного источника.
+
+    Args:
+        article (Dict[str, Any]): Статья.
+
+    Returns:
+        bool: True, если источник статьи приоритетный.
+    """
+    return PRIORITY_SOURCES_RE.search(article['source'].lower()) is not None
+
+
+def get_today_event_keywords() -> List[Set[str]]:
+    """
+    Возвращает ключевые слова сегодняшних событий.
+
+    Returns:
+        List[Set[str]]: Множество ключевых слов в нижнем регистре для каждого события.
+    """
+    return [set(keyword.strip() for keyword in event[3].lower().split(',')) for event in get_today_events_cached()]
+
+
+def tokenize(content_lc: str) -> Set[str]:
+    """
+    Разбивает текст на множество слов.
+
+    Args:
+        content_lc (str): Текст в нижнем регистре.
+
+    Returns:
+        Set[str]: Множество слов текста.
+    """
+    return set(re.findall(r'\w+', content_lc))
+
+
+def process_single_article(article: Dict[str, Any], title: str, summary: str,
+                           today_event_kws: List[Set[str]]) -> Dict[str, Any]:
     """
     Обрабатывает отдельную статью.
 
     Args:
         article (Dict[str, Any]): Необработанная статья.
+        title (str): Переведенный заголовок.
+        summary (str): Переведенное краткое содержание.
+        today_event_kws (List[Set[str]]): Ключевые слова сегодняшних событий.
 
     Returns:
         Dict[str, Any]: Обработанная статья или None, если статья не прошла фильтрацию.
     """
-    # Перевод
-    title = translate_text(clean_html(article['title']))
-    summary = translate_text(clean_html(article['summary']))
-
     # Обрезка summary до заданной длины
     summary = truncate_summary(summary, SUMMARY_LENGTH)
 
-    # Категоризация
-    category = categorize_article(title + " " + summary)
+    # Текст просматривается автоматом один раз: категории и все служебные метки берутся из этого прохода
+    category_scores, flags = scan_keywords((title + " " + summary).lower())
 
-    # Оценка интересности
-    interest_score = calculate_interest_score(article, title, summary)
+    state = {
+        'title': title,
+        'summary': summary,
+        # Категоризация
+        'category': categorize_article(category_scores, flags),
+        # Тональность считается один раз и сохраняется в статье для get_article_scores
+        'sentiment': sia.polarity_scores(title + " " + summary)['compound'],
+        # Наличие ключевых слов, указывающих на важность или новизну
+        'is_important': IMPORTANCE_TAG in flags,
+        # Проверка на срочные новости
+        'is_breaking': is_breaking_news(article, flags)
+    }
 
-    # Проверка на срочные новости
-    is_breaking = is_breaking_news(article, title, summary)
+    return build_processed_article(article, state, today_event_kws)
+
+
+def build_processed_article(article: Dict[str, Any], state: Dict[str, Any],
+                            today_event_kws: List[Set[str]]) -> Dict[str, Any]:
+    """
+    Собирает обработанную статью из результатов анализа ее текста.
+
+    Args:
+        article (Dict[str, Any]): Необработанная статья.
+        state (Dict[str, Any]): Результаты анализа текста: перевод, категория, тональность и признаки.
+        today_event_kws (List[Set[str]]): Ключевые слова сегодняшних событий.
+
+    Returns:
+        Dict[str, Any]: Обработанная статья.
+    """
+    content_lc = (state['title'] + " " + state['summary']).lower()
+
+    # Часть оценки интересности, зависящая от текста; остальное добавит calculate_interest_scores
+    content_score = calculate_content_score(state['sentiment'], state['category'], state['is_important'],
+                                            content_lc, today_event_kws)
 
     return {
         'id': article['id'],
-        'title': title,
-        'summary': summary,
+        'title': state['title'],
+        'summary': state['summary'],
         'link': article['link'],
         'pub_date': article['pub_date'],
         'source': article['source'],
-        'category': category,
-        'interest_score': interest_score,
-        'is_breaking': is_breaking
+        'category': state['category'],
+        '_content_score': content_score,
+        '_sentiment': state['sentiment'],
+        '_is_important': state['is_important'],
+        'is_breaking': state['is_breaking']
     }
 
 
-def translate_text(text: str) -> str:
+def get_article_state(processed: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Переводит текст на целевой язык.
+    Возвращает результаты анализа текста обработанной статьи для сохранения в базе данных.
 
     Args:
-        text (str): Исходный текст.
+        processed (Dict[str, Any]): Обработанная статья.
 
     Returns:
-        str: Переведенный текст.
+        Dict[str, Any]: Результаты анализа текста, из которых build_processed_article восстановит статью.
     """
-    try:
-        return translator.translate(text, dest=TARGET_LANGUAGE).text
-    except Exception as e:
-        logger.error(f"Ошибка при переводе текста: {e}")
-        return text  # Возвращаем исходный текст в случае ошибки
+    return {
+        'title': processed['title'],
+        'summary': processed['summary'],
+        'category': processed['category'],
+        'sentiment': processed['_sentiment'],
+        'is_important': processed['_is_important'],
+        'is_breaking': processed['is_breaking']
+    }
+
 
+def translation_key(text: str) -> str:
+    """Возвращает ключ кэша переводов для текста."""
+    return hashlib.sha1(f"{TARGET_LANGUAGE}:{text}".encode('utf-8')).hexdigest()
 
-def categorize_article(content: str) -> str:
+
+def load_translation_cache():
+    """Загружает последние сохраненные переводы из базы данных в память. Вызывается при запуске бота."""
+    cache_translations(get_recent_translations(TRANSLATION_CACHE_SIZE))
+    logger.info(f"Загружено {len(translation_cache)} переводов из кэша")
+
+
+def cache_translations(translations: List[Tuple[str, str]]):
+    """Добавляет переводы в кэш в памяти, вытесняя давно не использованные сверх TRANSLATION_CACHE_SIZE."""
+    with translation_cache_lock:
+        for key, translation in translations:
+            translation_cache[key] = translation
+            translation_cache.move_to_end(key)
+        while len(translation_cache) > TRANSLATION_CACHE_SIZE:
+            translation_cache.popitem(last=False)
+
+
+def get_cached_translations(keys: List[str]) -> Dict[str, str]:
+    """Возвращает переводы из кэша в памяти для заданных ключей, отмечая их как недавно использованные."""
+    found = {}
+    with translation_cache_lock:
+        for key in keys:
+            translation = translation_cache.get(key)
+            if translation is not None:
+                translation_cache.move_to_end(key)
+                found[key] = translation
+    return found
+
+
+def translate_articles(articles: List[Dict[str, Any]]) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    Переводит заголовки и краткие содержания статей одним пакетом.
+    Текст статей уже очищен от HTML в parse_entry; повторная очистка испортила бы его,
+    так как clean_html декодирует HTML-сущности (например, "&lt;dialog&gt;").
+
+    Args:
+        articles (List[Dict[str, Any]]): Необработанные статьи.
+
+    Returns:
+        List[Tuple[Optional[str], Optional[str]]]: Пары (переведенный заголовок, переведенное краткое содержание);
+        None вместо текста, который не удалось перевести.
+    """
+    texts = []
+    for article in articles:
+        texts.append(article['title'])
+        texts.append(article['summary'])
+    translations = translate_with_cache(texts)
+    return list(zip(translations[::2], translations[1::2]))
+
+
+def translate_with_cache(texts: List[str]) -> List[Optional[str]]:
+    """
+    Переводит список текстов на целевой язык пакетами по TRANSLATION_BATCH_SIZE текстов за запрос.
+    Пакеты переводятся параллельно в translation_executor, не более TRANSLATION_MAX_WORKERS запросов одновременно;
+    из потоков этого пула функцию следует вызывать не более чем с одним пакетом текстов.
+    Тексты, уже переведенные ранее, берутся из кэша в памяти или из базы данных и повторно не отправляются.
+
+    Args:
+        texts (List[str]): Исходные тексты.
+
+    Returns:
+        List[Optional[str]]: Переведенные тексты в том же порядке; None для текстов, которые не удалось перевести.
+    """
+    keys = [translation_key(text) for text in texts]
+    known = get_cached_translations(keys)
+    uncached = {key: text for key, text in zip(keys, texts) if key not in known}
+
+    # Переводы, вытесненные из памяти или не загруженные при запуске, ищем в базе данных
+    stored = {}
+    if uncached:
+        try:
+            stored = get_translations(list(uncached))
+        except Exception as e:
+            logger.error(f"Ошибка при загрузке переводов: {e}")
+        cache_translations(list(stored.items()))
+        known.update(stored)
+    misses = [(key, text) for key, text in uncached.items() if key not in stored]
+
+    if misses:
+        batches = [[text for _, text in misses[start:start + TRANSLATION_BATCH_SIZE]]
+                   for start in range(0, len(misses), TRANSLATION_BATCH_SIZE)]
+        if len(batches) == 1:
+            translated = translate_texts(batches[0])
+        else:
+            translated = [text for batch in translation_executor.map(translate_texts, batches) for text in batch]
+
+        # Ошибки перевода не кэшируются: такие тексты будут переведены заново в следующем цикле
+        new_translations = [(key, translation) for (key, _), translation in zip(misses, translated)
+                            if translation is not None]
+        cache_translations(new_translations)
+        try:
+            add_translations(new_translations)
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении переводов: {e}")
+        known.update(new_translations)
+
+    return [known.get(key) for key in keys]
+
+
+def categorize_article(category_scores: Counter, flags: Set[str]) -> str:
     """
     Определяет категорию статьи на основе ключевых слов.
 
     Args:
-        content (str): Содержание статьи (заголовок + краткое содержание).
+        category_scores (Counter): Количество совпадений ключевых слов по категориям (из scan_keywords).
+        flags (Set[str]): Служебные метки найденных ключевых слов (из scan_keywords).
 
     Returns:
         str: Определенная категория или None, если статья содержит слова из черного списка.
     """
-    content = content.lower()
-
     # Проверка на наличие слов из черного списка
-    if any(word.lower() in content for word in BLACKLIST_KEYWORDS):
+    if BLACKLIST_TAG in flags:
         return None
 
-    category_scores = {}
-
-    for cat, keywords in category_keywords.items():
-        category_scores[cat] = sum(content.count(keyword.lower()) for keyword in keywords)
-
-    if not any(category_scores.values()):
+    if not category_scores:
         return None  # Если не найдено ни одного совпадения, возвращаем None
 
-    return max(category_scores, key=category_scores.get)
+    return max(category_scores, key=lambda cat: (category_scores[cat], -CATEGORY_ORDER[cat]))
 
 
-def calculate_interest_score(article: Dict[str, Any], title: str, summary: str) -> float:
+def calculate_content_score(sentiment: float, category: str, is_important: bool, content_lc: str,
+                            today_event_kws: List[Set[str]]) -> float:
     """
-    Вычисляет оценку интересности статьи.
+    Вычисляет часть оценки интересности, зависящую от текста статьи.
 
     Args:
-        article (Dict[str, Any]): Исходная статья.
-        title (str): Переведенный заголовок.
-        summary (str): Переведенное краткое содержание.
+        sentiment (float): Тональность заголовка и краткого содержания (compound VADER).
+        category (str): Категория статьи, определенная categorize_article.
+        is_important (bool): Есть ли в тексте ключевые слова, указывающие на важность или новизну.
+        content_lc (str): Заголовок и краткое содержание в нижнем регистре.
+        today_event_kws (List[Set[str]]): Ключевые слова сегодняшних событий.
 
     Returns:
-        float: Оценка интересности или 0, если статья не подходит.
+        float: Оценка по тексту или 0, если статья не подходит.
     """
-    content = title + " " + summary
-    category = categorize_article(content)
-
     if category is None:
         return 0  # Статья содержит слова из черного списка или не соответствует ни одной категории
 
+    # Анализ настроений (используем небольшой вес, чтобы это не было определяющим фактором)
+    score = sentiment * 0.1
+
+    # Проверка связи с сегодняшними событиями
+    content_tokens = tokenize(content_lc)
+    related_events = sum(1 for event_keywords in today_event_kws if event_keywords & content_tokens)
+    score += related_events * 0.5  # Добавляем небольшой бонус за связь с текущими событиями
+
+    # Наличие ключевых слов, указывающих на важность или новизну
+    if is_important:
+        score += 0.3
+
+    return score
+
+
+def calculate_interest_scores(articles: List[Dict[str, Any]]):
+    """
+    Вычисляет итоговые оценки интересности для списка обработанных статей и записывает их в 'interest_score'.
+    Вес категории, временная актуальность, приоритет источника и длина считаются векторно для всех статей сразу.
+
+    Args:
+        articles (List[Dict[str, Any]]): Обработанные статьи с оценкой по тексту в '_content_score'.
+    """
+    if not articles:
+        return
+
+    now = datetime.now()
+    categories = [article['category'] for article in articles]
+
     # Начинаем с веса категории
-    score = category_weights.get(category, 0.0)
+    scores = np.array([category_weights.get(category, 0.0) for category in categories])
 
     # Если категория не приоритетная, значительно снижаем оценку
-    if category not in PRIORITY_CATEGORIES:
-        score *= 0.1
+    priority_mask = np.array([category in PRIORITY_CATEGORIES for category in categories])
+    scores = np.where(priority_mask, scores, scores * 0.1)
 
-    # Анализ настроений (используем небольшой вес, чтобы это не было определяющим фактором)
-    sentiment_score = sia.polarity_scores(content)['compound']
-    score += sentiment_score * 0.1
+    # Тональность, связь с событиями и ключевые слова важности
+    scores += np.array([article.pop('_content_score') for article in articles])
 
-    # Проверка связи с сегодняшними событиями
-    today_events = get_today_events()
-    for event in today_events:
-        event_keywords = event[3].split(',')
-        if any(keyword.lower() in content.lower() for keyword in event_keywords):
-            score += 0.5  # Добавляем небольшой бонус за связь с текущими событиями
-
-    # Временная актуальность
-    time_diff = datetime.now() - article['pub_date']
-    if time_diff.days == 0:
-        score += 0.3  # Небольшой бонус для статей, опубликованных сегодня
-    elif time_diff.days <= 2:
-        score += 0.1  # Совсем небольшой бонус для статей не старше 2 дней
+    # Временная актуальность: бонус для статей, опубликованных сегодня, и совсем небольшой — не старше 2 дней
+    ages = np.array([(now - article['pub_date']).days for article in articles])
+    scores += np.where(ages == 0, 0.3, np.where(ages <= 2, 0.1, 0.0))
 
     # Приоритетные источники
-    if any(source in article['source'] for source in PRIORITY_SOURCES):
-        score += 0.2
+    scores += np.where([is_priority_source(article) for article in articles], 0.2, 0.0)
 
     # Длина статьи (предполагаем, что более длинные статьи могут быть более информативными)
-    content_length = len(content)
-    if content_length > 1000:
-        score += 0.2
-    elif content_length > 500:
-        score += 0.1
+    lengths = np.fromiter((len(article['title']) + 1 + len(article['summary']) for article in articles),
+                          dtype=np.int64, count=len(articles))
+    scores += np.where(lengths > 1000, 0.2, np.where(lengths > 500, 0.1, 0.0))
 
-    # Наличие ключевых слов, указывающих на важность или новизну
-    importance_keywords = ["важно", "критично", "прорыв", "революционно", "впервые"]
-    if any(keyword in content.lower() for keyword in importance_keywords):
-        score += 0.3
+    # Статьи из черного списка или без категории не оцениваются
+    scores = np.where([category is not None for category in categories], scores, 0.0)
 
-    return score
+    for article, score in zip(articles, scores):
+        article['interest_score'] = float(score)
 
 
-def is_breaking_news(article: Dict[str, Any], title: str, summary: str) -> bool:
+def is_breaking_news(article: Dict[str, Any], flags: Set[str]) -> bool:
     """
     Определяет, является ли новость срочной.
 
     Args:
         article (Dict[str, Any]): Исходная статья.
-        title (str): Переведенный заголовок.
-        summary (str): Переведенное краткое содержание.
+        flags (Set[str]): Служебные метки ключевых слов, найденных в переведенном тексте (из scan_keywords).
 
     Returns:
         bool: True, если новость срочная, иначе False.
     """
-    text_to_check = (title + " " + summary).lower()
-
     # Проверка ключевых слов
-    if any(keyword.lower() in text_to_check for keyword in BREAKING_NEWS_KEYWORDS):
+    if BREAKING_TAG in flags:
         return True
 
     # Проверка приоритетных источников
-    if any(source in article['source'] for source in PRIORITY_SOURCES):
+    if is_priority_source(article):
         return True
 
     return False
@@ -225,15 +575,47 @@ def select_interesting_articles(articles, num_to_select=5):
     top_count = int(num_to_select * TOP_ARTICLES_PERCENTAGE)
     selected = sorted_articles[:top_count]
 
-    # Добавление разнообразия
-    other_articles = [a for a in sorted_articles if a not in selected]
-    diversity_count = num_to_select - top_count
-    if other_articles:
-        selected += random.sample(other_articles, min(len(other_articles), diversity_count))
+    # Добавление разнообразия: остальные статьи — это хвост отсортированного списка
+    other_articles = sorted_articles[top_count:]
+    diversity_count = max(num_to_select - top_count, 0)
+    if other_articles and diversity_count:
+        selected += sample_by_category(other_articles, diversity_count)
 
     return selected
 
 
+def sample_by_category(articles: List[Dict[str, Any]], count: int) -> List[Dict[str, Any]]:
+    """
+    Выбирает случайные статьи, стараясь взять их из как можно большего числа категорий.
+
+    Args:
+        articles (List[Dict[str, Any]]): Статьи для выбора.
+        count (int): Количество статей для выбора.
+
+    Returns:
+        List[Dict[str, Any]]: Выбранные статьи, не более count.
+    """
+    buckets = defaultdict(list)
+    for article in articles:
+        buckets[article['category']].append(article)
+
+    bucket_list = list(buckets.values())
+    random.shuffle(bucket_list)
+    for bucket in bucket_list:
+        random.shuffle(bucket)
+
+    # По очереди берем по одной статье из каждой непустой категории
+    sampled = []
+    while len(sampled) < count and bucket_list:
+        for bucket in bucket_list:
+            if len(sampled) == count:
+                break
+            sampled.append(bucket.pop())
+        bucket_list = [bucket for bucket in bucket_list if bucket]
+
+    return sampled
+
+
 def ensure_diversity(articles: List[Dict[str, Any]], num_diverse: int = 3) -> List[Dict[str, Any]]:
     """
     Обеспечивает разнообразие в выбранных статьях.
@@ -248,29 +630,22 @@ def ensure_diversity(articles: List[Dict[str, Any]], num_diverse: int = 3) -> Li
     if len(articles) <= num_diverse:
         return articles
 
-    vectorizer = TfidfVectorizer()
-    tfidf_matrix = vectorizer.fit_transform([article['title'] + " " + article['summary'] for article in articles])
-
-    diverse_articles = [articles[0]]  # Начинаем с самой интересной статьи
-    for _ in range(num_diverse - 1):
-        if len(diverse_articles) == len(articles):
-            break
+    text_matrix = diversity_vectorizer.transform([article['title'] + " " + article['summary'] for article in articles])
 
-        candidate_scores = []
-        for article in articles:
-            if article not in diverse_articles:
-                article_index = articles.index(article)
-                max_similarity = max(
-                    cosine_similarity(tfidf_matrix[article_index], tfidf_matrix[articles.index(div_article)])
-                    for div_article in diverse_articles
-                )[0][0]
-                score = article['interest_score'] * (1 - max_similarity)
-                candidate_scores.append((article, score))
+    # Попарное сходство всех статей считается один раз
+    similarity = cosine_similarity(text_matrix)
+    scores = np.array([article['interest_score'] for article in articles])
 
-        if candidate_scores:
-            diverse_articles.append(max(candidate_scores, key=lambda x: x[1])[0])
+    selected = [0]  # Начинаем с самой интересной статьи
+    max_similarity = similarity[0].copy()  # Максимальное сходство каждой статьи с уже выбранными
+    for _ in range(num_diverse - 1):
+        candidate_scores = scores * (1 - max_similarity)
+        candidate_scores[selected] = -np.inf
+        best = int(candidate_scores.argmax())
+        selected.append(best)
+        max_similarity = np.maximum(max_similarity, similarity[best])
 
-    return diverse_articles
+    return [articles[i] for i in selected]
 
 
 def expand_keywords(initial_keywords, corpus, top_n=5):
@@ -283,29 +658,37 @@ def expand_keywords(initial_keywords, corpus, top_n=5):
 
     # Получение всех слов из векторизатора
     feature_names = vectorizer.get_feature_names_out()
+    vocabulary = vectorizer.vocabulary_
 
     expanded_keywords = set(initial_keywords)
-    for keyword in initial_keywords:
-        # Найти индекс ключевого слова
-        if keyword in feature_names:
-            keyword_index = list(feature_names).index(keyword)
 
-            # Вычислить косинусное сходство между ключевым словом и всеми другими словами
-            keyword_vector = tfidf_matrix[:, keyword_index].toarray().reshape(1, -1)
-            cosine_similarities = cosine_similarity(keyword_vector, tfidf_matrix.transpose()).flatten()
+    # Индексы ключевых слов, встречающихся в корпусе
+    keyword_indices = [vocabulary[keyword] for keyword in initial_keywords if keyword in vocabulary]
+    if not keyword_indices or top_n <= 0:
+        return list(expanded_keywords)
 
-            # Получить топ N наиболее похожих слов
-            similar_word_indices = cosine_similarities.argsort()[:-top_n - 1:-1]
-            similar_words = [feature_names[index] for index in similar_word_indices if feature_names[index] != keyword]
+    # После нормировки столбцов их скалярное произведение равно косинусному сходству слов,
+    # поэтому сходство всех ключевых слов со всеми словами считается одним разреженным умножением
+    word_vectors = normalize(tfidf_matrix, axis=0)
+    similarities = (word_vectors[:, keyword_indices].T @ word_vectors).toarray()
 
-            expanded_keywords.update(similar_words)
+    # Топ N наиболее похожих слов для каждого ключевого слова
+    top_n = min(top_n, len(feature_names))
+    top_indices = np.argpartition(-similarities, top_n - 1, axis=1)[:, :top_n]
+    for keyword_index, similar_word_indices in zip(keyword_indices, top_indices):
+        similar_word_indices = similar_word_indices[similar_word_indices != keyword_index]
+        expanded_keywords.update(feature_names[similar_word_indices].tolist())
 
     return list(expanded_keywords)
 
 
 def update_category_keywords(articles):
+    global keyword_index, keyword_automaton
     for category, keywords in category_keywords.items():
         category_keywords[category] = expand_keywords(keywords, articles)
+        category_keywords_lc[category] = [keyword.lower() for keyword in category_keywords[category]]
+    keyword_index = build_keyword_index()
+    keyword_automaton = build_keyword_automaton(keyword_index)
 
 # Эту функцию нужно вызывать периодически, например, раз в день или неделю
 def process_and_update_keywords(articles):
@@ -323,18 +706,21 @@ def get_article_scores(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     Returns:
         List[Dict[str, Any]]: Список словарей с детальной информацией об оценках.
     """
+    today_event_kws = get_today_event_keywords()
+
     scored_articles = []
     for article in articles:
         content = article['title'] + " " + article['summary']
-        sentiment_score = sia.polarity_scores(content)['compound']
+        sentiment_score = article.get('_sentiment')
+        if sentiment_score is None:
+            sentiment_score = sia.polarity_scores(content)['compound']
 
-        today_events = get_today_events()
-        event_relevance = sum(
-            1 for event in today_events if any(keyword.lower() in content.lower() for keyword in event[3].split(',')))
+        content_tokens = tokenize(content.lower())
+        event_relevance = sum(1 for event_keywords in today_event_kws if event_keywords & content_tokens)
 
         time_relevance = 1 if (datetime.now() - article['pub_date']).days == 0 else 0
 
-        source_priority = 1 if any(source in article['source'] for source in PRIORITY_SOURCES) else 0
+        source_priority = 1 if is_priority_source(article) else 0
 
         category_weight = category_weights.get(article['category'], 1.0)
 
@@ -2,29 +2,43 @@ import telebot
 import schedule
 import time
 import threading
-import sqlite3
 import random
 from datetime import datetime, timedelta
 import logging
 from .rss_parser import fetch_articles
-from .article_processor import process_articles, select_interesting_articles
+from .article_processor import process_articles, select_interesting_articles, load_translation_cache
 from .publisher import publish_to_telegram
-from .database import create_db, initialize_events, is_article_published, add_published_article
+from .database import (
+    create_db, initialize_events, is_article_published, get_best_publishing_hours,
+    clear_old_data, vacuum_db, flush_post_stats
+)
 from .telegram_handlers import setup_bot_commands, send_initial_message
 from .events import update_events
 from .utils import setup_logging
 from .telegram_handlers import register_handlers
 from config import PUBLISH_INTERVAL, MIN_PUBLICATION_INTERVAL, MAX_PUBLICATIONS_PER_HOUR, MIN_INTEREST_SCORE, PUBLICATION_DELAY_INCREASE
 
+# Максимальное время ожидания планировщика между проверками задач, в секундах
+SCHEDULER_MAX_IDLE = 60
+# Количество потоков для обработчиков команд: долгий /scores не должен блокировать остальные команды
+BOT_HANDLER_THREADS = 4
+
+
 class NewsBot:
     def __init__(self, token, admin_chat_id, channel_id):
-        self.bot = telebot.TeleBot(token)
+        self.bot = telebot.TeleBot(token, num_threads=BOT_HANDLER_THREADS)
         self.admin_chat_id = admin_chat_id
         self.channel_id = channel_id
         self.pause_until = None
         self.pause_timer = None
+        self.stop_event = threading.Event()
+        # Статьи из последнего цикла обработки: по ним команда /scores строит таблицу оценок
+        self.last_processed_articles = []
+        self.last_processed_at = None
         self.logger = logging.getLogger(__name__)
         self.publication_delay = PUBLISH_INTERVAL  # Инициализация задержки публикации
+        # Схема базы нужна до первого чтения сводки по часам (таблица hourly_engagement)
+        create_db()
         self.optimal_publishing_hours = self.analyze_optimal_publishing_time()
 
     def send_log(self, message):
@@ -32,23 +46,13 @@ class NewsBot:
         self.bot.send_message(self.admin_chat_id, f"LOG: {message}")
 
     def analyze_optimal_publishing_time(self):
-        with sqlite3.connect('news_bot.db', detect_types=sqlite3.PARSE_DECLTYPES) as conn:
-            c = conn.cursor()
-            c.execute("""
-                SELECT strftime('%H', post_time) as hour,
-                       AVG(views + forwards * 5 + reactions * 2) as engagement_score
-                FROM post_stats
-                WHERE post_time >= datetime('now', '-30 days')
-                GROUP BY hour
-                ORDER BY engagement_score DESC
-                LIMIT 5
-            """)
-            result = c.fetchall()
+        # Сводка по часам поддерживается в log_post_stats, поэтому здесь не нужно агрегировать post_stats
+        result = get_best_publishing_hours(5)
 
         if not result:
             return [9, 12, 15, 18, 21]  # Значения по умолчанию
 
-        return [int(hour) for hour, _ in result if hour is not None]
+        return result
 
     def update_optimal_publishing_time(self):
         self.optimal_publishing_hours = self.analyze_optimal_publishing_time()
@@ -68,8 +72,10 @@ class NewsBot:
 
     def run(self):
         self.send_log("Бот запускается...")
-        create_db()
         initialize_events()
+        # Старые данные удаляются и при запуске: после перезапуска ежедневная задача сработает только в полночь
+        self.clear_old_db_data()
+        load_translation_cache()
         setup_bot_commands(self.bot)
         send_initial_message(self.bot, self.admin_chat_id)
 
@@ -78,6 +84,8 @@ class NewsBot:
 
         schedule.every(PUBLISH_INTERVAL).minutes.do(self.run_scheduled_job)
         schedule.every().day.at("00:00").do(self.update_optimal_publishing_time)
+        schedule.every().day.at("00:00").do(self.clear_old_db_data)
+        schedule.every(30).days.do(self.run_db_maintenance)
 
         polling_thread = threading.Thread(target=self.bot.polling, kwargs={"none_stop": True})
         polling_thread.start()
@@ -85,19 +93,26 @@ class NewsBot:
         self.send_log("Бот успешно запущен и готов к работе!")
 
         try:
-            while True:
+            while not self.stop_event.is_set():
                 schedule.run_pending()
-                time.sleep(1)
+                # Спим до ближайшей задачи, но не дольше SCHEDULER_MAX_IDLE; stop() будит цикл сразу
+                idle = schedule.idle_seconds()
+                timeout = SCHEDULER_MAX_IDLE if idle is None else max(0.0, min(idle, SCHEDULER_MAX_IDLE))
+                self.stop_event.wait(timeout)
         except KeyboardInterrupt:
             self.send_log("Получен сигнал завершения. Останавливаем бота...")
         finally:
             self.stop()
 
     def stop(self):
+        if self.stop_event.is_set():
+            return
+        self.stop_event.set()
         self.send_log("Останавливаем бота...")
         if self.pause_timer:
             self.pause_timer.cancel()
         self.bot.stop_polling()
+        flush_post_stats()
         self.send_log("Бот остановлен.")
 
     def run_scheduled_job(self):
@@ -110,6 +125,12 @@ class NewsBot:
         return self.pause_until and datetime.now() < self.pause_until
 
     def process_and_publish(self):
+        """
+        Получает, обрабатывает и публикует интересные статьи.
+
+        Сохранение опубликованных статей в базе выполняет publish_to_telegram,
+        поэтому здесь статьи повторно не записываются.
+        """
         if not self.should_publish_now():
             self.send_log("Текущее время не оптимально для публикации. Пропуск цикла.")
             return
@@ -121,6 +142,8 @@ class NewsBot:
             return
 
         processed_articles = process_articles(articles)
+        self.last_processed_articles = processed_articles
+        self.last_processed_at = datetime.now()
         interesting_articles = [article for article in processed_articles if
                                 article['interest_score'] >= MIN_INTEREST_SCORE]
 
@@ -152,8 +175,6 @@ class NewsBot:
                 try:
                     message_id = publish_to_telegram(self.bot, article, self.channel_id)
                     if message_id:
-                        add_published_article(article['id'], article['title'],
-                                              current_time.strftime('%Y-%m-%d %H:%M:%S'))
                         published_count += 1
                         last_publication_time = current_time
                         self.send_log(f"Статья опубликована: {article['title']}")
@@ -162,6 +183,19 @@ class NewsBot:
 
         self.send_log(f"Цикл обработки завершен. Опубликовано {published_count} статей.")
 
+    def clear_old_db_data(self):
+        try:
+            clear_old_data()
+        except Exception as e:
+            self.logger.error(f"Ошибка при очистке старых данных: {e}")
+
+    def run_db_maintenance(self):
+        try:
+            vacuum_db()
+            self.send_log("Обслуживание базы данных завершено")
+        except Exception as e:
+            self.logger.error(f"Ошибка при обслуживании базы данных: {e}")
+
     def increase_publication_delay(self, increase_minutes):
         self.publication_delay += increase_minutes
         self.send_log(f"Задержка публикации увеличена. Новая задержка: {self.publication_delay} минут")
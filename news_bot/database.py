@@ -1,16 +1,49 @@
 import sqlite3
+import json
 import logging
-from typing import List, Tuple, Optional
+import queue
+import threading
+from typing import Any, Dict, List, Set, Tuple, Optional
 from datetime import datetime, date, timedelta
 
 logger = logging.getLogger(__name__)
 
 DB_NAME = 'news_bot.db'
+SQLITE_MAX_PARAMS = 900  # Максимальное количество параметров в одном запросе с IN (...)
+PROCESSED_ARTICLES_TTL_DAYS = 7  # Статьи старше недели не попадают в выборку, поэтому их результаты не храним
+STATS_BATCH_SIZE = 50  # Максимальное количество обновлений статистики в одной транзакции
+
+
+# Соединения с базой данных, по одному на поток
+_local = threading.local()
+
+# id опубликованных статей; загружаются из базы в create_db и пополняются при записи публикаций
+_published_ids: Set[str] = set()
+
+# Очередь обновлений статистики постов, которую разбирает фоновый поток записи
+_stats_queue: queue.Queue = queue.Queue()
+_stats_writer: Optional[threading.Thread] = None
+_stats_writer_lock = threading.Lock()
+
+# События на сегодня в виде (дата, строки); сбрасывается при изменении таблицы событий
+_today_events_cache: Optional[Tuple[date, List[Tuple[int, str, date, str]]]] = None
 
 
 def get_db_connection():
-    """Создает соединение с базой данных."""
-    return sqlite3.connect(DB_NAME, detect_types=sqlite3.PARSE_DECLTYPES)
+    """
+    Возвращает соединение с базой данных для текущего потока, создавая его при первом обращении.
+    Соединение не закрывается после использования: `with get_db_connection() as conn`
+    только фиксирует или откатывает транзакцию.
+    """
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(DB_NAME, detect_types=sqlite3.PARSE_DECLTYPES)
+        # В режиме WAL достаточно синхронизации на контрольных точках, а не при каждом коммите
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-20000")
+        _local.conn = conn
+    return conn
 
 
 def create_db():
@@ -18,6 +51,9 @@ def create_db():
     with get_db_connection() as conn:
         c = conn.cursor()
 
+        # Журнал WAL сохраняется в файле базы и действует для всех последующих соединений
+        c.execute("PRAGMA journal_mode=WAL")
+
         # Таблица для статей
         c.execute('''CREATE TABLE IF NOT EXISTS articles
                      (id TEXT PRIMARY KEY, 
@@ -39,16 +75,63 @@ def create_db():
                      forwards INTEGER,
                      reactions INTEGER)''')
 
+        # Таблица для кэша переводов
+        c.execute('''CREATE TABLE IF NOT EXISTS translations
+                     (text_hash TEXT PRIMARY KEY,
+                     translation TEXT,
+                     created_at DATETIME DEFAULT CURRENT_TIMESTAMP)''')
+
+        # Таблица для результатов обработки статей (перевод, категория, тональность)
+        c.execute('''CREATE TABLE IF NOT EXISTS processed_articles
+                     (id TEXT PRIMARY KEY,
+                     pub_date TEXT,
+                     data TEXT)''')
+
+        # Сводная вовлеченность по часам публикации, обновляется в log_post_stats
+        c.execute('''CREATE TABLE IF NOT EXISTS hourly_engagement
+                     (hour INTEGER PRIMARY KEY,
+                     score REAL,
+                     count INTEGER)''')
+        # Заполняем сводку по уже накопленной статистике
+        c.execute('''INSERT OR IGNORE INTO hourly_engagement (hour, score, count)
+                     SELECT CAST(strftime('%H', post_time) AS INTEGER) AS hour,
+                            SUM(views + forwards * 5 + reactions * 2), COUNT(*)
+                     FROM post_stats
+                     WHERE post_time IS NOT NULL
+                     GROUP BY hour''')
+
+        # Индексы для частых запросов по датам
+        c.execute("CREATE INDEX IF NOT EXISTS idx_articles_pubdate ON articles(pub_date)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_events_date ON events(date)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_post_stats_time ON post_stats(post_time)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_processed_articles_pubdate ON processed_articles(pub_date)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_translations_created ON translations(created_at)")
+        # Индекс по выражению вовлеченности, по которому сортирует get_top_articles
+        c.execute('''CREATE INDEX IF NOT EXISTS idx_post_stats_engagement
+                     ON post_stats((views + forwards * 5 + reactions * 2))''')
+
         conn.commit()
+
+        # Обновляем статистику для планировщика запросов
+        c.execute("ANALYZE")
+
+    load_published_ids()
     logger.info("База данных успешно инициализирована")
 
 
-def is_article_published(article_id: str) -> bool:
-    """Проверяет, была ли статья уже опубликована."""
+def load_published_ids():
+    """Загружает id всех опубликованных статей в память."""
     with get_db_connection() as conn:
         c = conn.cursor()
-        c.execute("SELECT * FROM articles WHERE id=?", (article_id,))
-        return c.fetchone() is not None
+        c.execute("SELECT id FROM articles")
+        ids = {row[0] for row in c.fetchall()}
+    _published_ids.clear()
+    _published_ids.update(ids)
+
+
+def is_article_published(article_id: str) -> bool:
+    """Проверяет, была ли статья уже опубликована."""
+    return article_id in _published_ids
 
 
 def add_published_article(article_id: str, title: str, pub_date: str):
@@ -57,6 +140,7 @@ def add_published_article(article_id: str, title: str, pub_date: str):
         c = conn.cursor()
         c.execute("INSERT OR REPLACE INTO articles VALUES (?, ?, ?)", (article_id, title, pub_date))
         conn.commit()
+    _published_ids.add(article_id)
     logger.info(f"Статья добавлена в базу данных: {title}")
 
 
@@ -74,6 +158,7 @@ def initialize_events():
     Инициализирует таблицу событий в базе данных.
     Эта функция должна вызываться при запуске бота.
     """
+    global _today_events_cache
     with get_db_connection() as conn:
         c = conn.cursor()
 
@@ -87,20 +172,35 @@ def initialize_events():
         # Очищаем существующие события
         c.execute("DELETE FROM events")
         conn.commit()
+    _today_events_cache = None
 
     logger.info("Таблица событий инициализирована")
 
 
 def add_event(name: str, event_date: date, keywords: List[str]):
     """Добавляет новое событие в базу данных."""
+    global _today_events_cache
     with get_db_connection() as conn:
         c = conn.cursor()
         c.execute("INSERT INTO events (name, date, keywords) VALUES (?, ?, ?)",
                   (name, event_date, ','.join(keywords)))
         conn.commit()
+    _today_events_cache = None
     logger.info(f"Событие добавлено в базу данных: {name}")
 
 
+def add_events_bulk(events: List[Tuple[str, date, List[str]]]):
+    """Добавляет несколько событий в базу данных одной транзакцией."""
+    global _today_events_cache
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.executemany("INSERT INTO events (name, date, keywords) VALUES (?, ?, ?)",
+                      [(name, event_date, ','.join(keywords)) for name, event_date, keywords in events])
+        conn.commit()
+    _today_events_cache = None
+    logger.info(f"Добавлено событий в базу данных: {len(events)}")
+
+
 def get_today_events() -> List[Tuple[int, str, date, str]]:
     """Возвращает события на сегодня."""
     today = date.today()
@@ -110,17 +210,184 @@ def get_today_events() -> List[Tuple[int, str, date, str]]:
         return c.fetchall()
 
 
+def get_today_events_cached() -> List[Tuple[int, str, date, str]]:
+    """Возвращает события на сегодня, обращаясь к базе данных не чаще раза в день или после их изменения."""
+    global _today_events_cache
+    today = date.today()
+    if _today_events_cache is None or _today_events_cache[0] != today:
+        _today_events_cache = (today, get_today_events())
+    return _today_events_cache[1]
+
+
 def log_post_stats(message_id: int, post_time: datetime, views: int = 0, forwards: int = 0, reactions: int = 0):
-    """Логирует или обновляет статистику поста."""
+    """
+    Ставит статистику поста в очередь на запись, не дожидаясь обращения к базе данных.
+    Запись выполняется фоновым потоком пачками в одной транзакции.
+    """
+    start_stats_writer()
+    _stats_queue.put((message_id, post_time, views, forwards, reactions))
+
+
+def start_stats_writer():
+    """Запускает фоновый поток записи статистики, если он еще не запущен."""
+    global _stats_writer
+    with _stats_writer_lock:
+        if _stats_writer is None or not _stats_writer.is_alive():
+            _stats_writer = threading.Thread(target=stats_writer_loop, name='stats-writer', daemon=True)
+            _stats_writer.start()
+
+
+def stats_writer_loop():
+    """Разбирает очередь статистики и записывает накопившиеся обновления одной транзакцией."""
+    while True:
+        items = [_stats_queue.get()]
+        while len(items) < STATS_BATCH_SIZE:
+            try:
+                items.append(_stats_queue.get(timeout=0.5))
+            except queue.Empty:
+                break
+
+        try:
+            with get_db_connection() as conn:
+                c = conn.cursor()
+                for item in items:
+                    write_post_stats(c, *item)
+                conn.commit()
+            logger.info(f"Статистика постов обновлена: {len(items)} записей")
+        except Exception as e:
+            logger.error(f"Ошибка при записи статистики постов: {e}")
+        finally:
+            for _ in items:
+                _stats_queue.task_done()
+
+
+def flush_post_stats():
+    """Дожидается записи всей статистики, поставленной в очередь."""
+    _stats_queue.join()
+
+
+def write_post_stats(c: sqlite3.Cursor, message_id: int, post_time: datetime, views: int = 0, forwards: int = 0,
+                     reactions: int = 0):
+    """
+    Записывает статистику поста и обновляет сводную вовлеченность по часам без фиксации транзакции.
+
+    Args:
+        c (sqlite3.Cursor): Курсор открытой транзакции.
+        message_id (int): ID сообщения в Telegram.
+        post_time (datetime): Время публикации поста.
+        views (int): Количество просмотров.
+        forwards (int): Количество пересылок.
+        reactions (int): Количество реакций.
+    """
+    engagement = views + forwards * 5 + reactions * 2
+    c.execute('''SELECT CAST(strftime('%H', post_time) AS INTEGER), views + forwards * 5 + reactions * 2
+                 FROM post_stats WHERE message_id = ?''', (message_id,))
+    previous = c.fetchone()
+
+    c.execute('''INSERT OR REPLACE INTO post_stats 
+                 (message_id, post_time, views, forwards, reactions) 
+                 VALUES (?, ?, ?, ?, ?)''',
+              (message_id, post_time, views, forwards, reactions))
+
+    if previous is None:
+        c.execute('''INSERT INTO hourly_engagement (hour, score, count) VALUES (?, ?, 1)
+                     ON CONFLICT(hour) DO UPDATE SET score = score + excluded.score, count = count + 1''',
+                  (post_time.hour, engagement))
+    else:
+        # Статистика поста обновилась: учитываем только разницу в его вовлеченности
+        previous_hour, previous_engagement = previous
+        c.execute("UPDATE hourly_engagement SET score = score + ? WHERE hour = ?",
+                  (engagement - previous_engagement, previous_hour))
+
+
+def record_publication(article_id: str, title: str, message_id: int, post_time: datetime):
+    """
+    Сохраняет опубликованную статью и ставит начальную статистику поста в очередь на запись.
+    Синхронно записывается только статья: она нужна для проверки повторной публикации.
+
+    Args:
+        article_id (str): ID статьи.
+        title (str): Заголовок статьи.
+        message_id (int): ID сообщения в Telegram.
+        post_time (datetime): Время публикации.
+    """
     with get_db_connection() as conn:
         c = conn.cursor()
-        c.execute('''INSERT OR REPLACE INTO post_stats 
-                     (message_id, post_time, views, forwards, reactions) 
-                     VALUES (?, ?, ?, ?, ?)''',
-                  (message_id, post_time, views, forwards, reactions))
+        c.execute("INSERT OR REPLACE INTO articles VALUES (?, ?, ?)",
+                  (article_id, title, post_time.strftime('%Y-%m-%d %H:%M:%S')))
         conn.commit()
-    logger.info(
-        f"Статистика поста обновлена: message_id={message_id}, views={views}, forwards={forwards}, reactions={reactions}")
+    _published_ids.add(article_id)
+    log_post_stats(message_id, post_time)
+    logger.info(f"Статья добавлена в базу данных: {title}")
+
+
+def get_recent_translations(limit: int) -> List[Tuple[str, str]]:
+    """Возвращает не более limit последних сохраненных переводов парами (хэш текста, перевод), от старых к новым."""
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute("SELECT text_hash, translation FROM translations ORDER BY created_at DESC LIMIT ?", (limit,))
+        return c.fetchall()[::-1]
+
+
+def get_translations(text_hashes: List[str]) -> Dict[str, str]:
+    """Возвращает сохраненные переводы для заданных хэшей текстов в виде словаря {хэш текста: перевод}."""
+    translations = {}
+    if not text_hashes:
+        return translations
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        for start in range(0, len(text_hashes), SQLITE_MAX_PARAMS):
+            chunk = text_hashes[start:start + SQLITE_MAX_PARAMS]
+            placeholders = ','.join('?' * len(chunk))
+            c.execute(f"SELECT text_hash, translation FROM translations WHERE text_hash IN ({placeholders})", chunk)
+            translations.update(c.fetchall())
+    return translations
+
+
+def add_translations(translations: List[Tuple[str, str]]):
+    """Сохраняет переводы, заданные парами (хэш текста, перевод)."""
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.executemany("INSERT OR REPLACE INTO translations (text_hash, translation) VALUES (?, ?)", translations)
+        conn.commit()
+
+
+def get_processed_articles(article_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Возвращает сохраненные результаты обработки статей в виде словаря {id статьи: данные}."""
+    processed = {}
+    if not article_ids:
+        return processed
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        for start in range(0, len(article_ids), SQLITE_MAX_PARAMS):
+            chunk = article_ids[start:start + SQLITE_MAX_PARAMS]
+            placeholders = ','.join('?' * len(chunk))
+            c.execute(f"SELECT id, data FROM processed_articles WHERE id IN ({placeholders})", chunk)
+            processed.update((article_id, json.loads(data)) for article_id, data in c.fetchall())
+    return processed
+
+
+def add_processed_articles(processed: List[Tuple[str, datetime, Dict[str, Any]]]):
+    """
+    Сохраняет результаты обработки статей, заданные тройками (id статьи, дата публикации, данные),
+    и удаляет результаты для статей старше PROCESSED_ARTICLES_TTL_DAYS дней.
+    """
+    cutoff = datetime.now() - timedelta(days=PROCESSED_ARTICLES_TTL_DAYS)
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.executemany("INSERT OR REPLACE INTO processed_articles (id, pub_date, data) VALUES (?, ?, ?)",
+                      [(article_id, pub_date.strftime('%Y-%m-%d %H:%M:%S'), json.dumps(data, ensure_ascii=False))
+                       for article_id, pub_date, data in processed])
+        c.execute("DELETE FROM processed_articles WHERE pub_date < ?", (cutoff.strftime('%Y-%m-%d %H:%M:%S'),))
+        conn.commit()
+
+
+def get_best_publishing_hours(limit: int = 5) -> List[int]:
+    """Возвращает часы с наибольшей средней вовлеченностью постов."""
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute("SELECT hour FROM hourly_engagement ORDER BY score / count DESC LIMIT ?", (limit,))
+        return [row[0] for row in c.fetchall()]
 
 
 def get_post_stats(days: int = 7) -> List[Tuple[int, datetime, int, int, int]]:
@@ -138,35 +405,45 @@ def get_publications_in_last_hour() -> int:
     with get_db_connection() as conn:
         c = conn.cursor()
         one_hour_ago = datetime.now() - timedelta(hours=1)
-        c.execute("SELECT COUNT(*) FROM articles WHERE pub_date > ?", (one_hour_ago.strftime('%Y-%m-%d %H:%M:%S'),))
+        # Подсчет по idx_articles_pubdate без чтения строк таблицы
+        c.execute("SELECT COUNT(1) FROM articles WHERE pub_date > ?", (one_hour_ago.strftime('%Y-%m-%d %H:%M:%S'),))
         return c.fetchone()[0]
 
 
 def clear_old_data(days: int = 30):
     """Очищает старые данные из базы данных."""
+    global _today_events_cache
+    # Параметр нельзя подставить внутрь строкового литерала, поэтому передаем модификатор целиком
+    modifier = f'-{days} days'
     with get_db_connection() as conn:
         c = conn.cursor()
-        c.execute("DELETE FROM articles WHERE pub_date < datetime('now', '-? days')", (days,))
-        c.execute("DELETE FROM events WHERE date < date('now', '-? days')", (days,))
-        c.execute("DELETE FROM post_stats WHERE post_time < datetime('now', '-? days')", (days,))
+        c.execute("DELETE FROM articles WHERE pub_date < datetime('now', ?)", (modifier,))
+        c.execute("DELETE FROM events WHERE date < date('now', ?)", (modifier,))
+        c.execute("DELETE FROM post_stats WHERE post_time < datetime('now', ?)", (modifier,))
+        c.execute("DELETE FROM translations WHERE created_at < datetime('now', ?)", (modifier,))
         conn.commit()
+    _today_events_cache = None
+    load_published_ids()
     logger.info(f"Старые данные (старше {days} дней) удалены из базы данных")
 
-def get_last_publication_time() -> Optional[datetime]:
-    """Возвращает время последней публикации."""
-    with get_db_connection() as conn:
-        c = conn.cursor()
-        c.execute("SELECT MAX(pub_date) FROM articles")
-        result = c.fetchone()[0]
-        return datetime.strptime(result, '%Y-%m-%d %H:%M:%S') if result else None
 
-def get_publications_in_last_hour() -> int:
-    """Возвращает количество публикаций за последний час."""
+def clear_old_events(days: int = 1):
+    """Удаляет из базы данных прошедшие события."""
+    global _today_events_cache
     with get_db_connection() as conn:
         c = conn.cursor()
-        one_hour_ago = datetime.now() - timedelta(hours=1)
-        c.execute("SELECT COUNT(*) FROM articles WHERE pub_date > ?", (one_hour_ago.strftime('%Y-%m-%d %H:%M:%S'),))
-        return c.fetchone()[0]
+        c.execute("DELETE FROM events WHERE date < date('now', ?)", (f'-{days} days',))
+        conn.commit()
+    _today_events_cache = None
+    logger.info(f"События старше {days} дней удалены из базы данных")
+
+
+def vacuum_db():
+    """Перестраивает файл базы данных, освобождая страницы, оставшиеся после удаления строк."""
+    conn = get_db_connection()
+    conn.execute("VACUUM")
+    logger.info("База данных перестроена (VACUUM)")
+
 
 def get_top_articles(limit: int = 10) -> List[Tuple[str, str, int, int, int]]:
     """Возвращает топ статей по просмотрам и реакциям."""
@@ -1,32 +1,48 @@
 import logging
+import re
+import time
 from typing import List, Dict, Any
 from datetime import datetime, date
 import requests
-from bs4 import BeautifulSoup
-from .database import add_event, get_today_events, clear_old_data
+from bs4 import BeautifulSoup, SoupStrainer
+from .utils import ttl_cache
+from .database import add_events_bulk, get_today_events, get_today_events_cached, clear_old_events
 
 logger = logging.getLogger(__name__)
 
 TECHMEME_EVENTS_URL = "https://www.techmeme.com/events"
+EVENTS_CACHE_TTL = 3600  # Время жизни кэша событий в секундах
+DIGEST_CACHE_TTL = 300  # Время жизни готового дайджеста событий в секундах
+
+# Последний успешно полученный список событий и время его получения
+_events_cache = {'time': 0.0, 'events': []}
+
+# Из страницы строятся только элементы событий, а не весь DOM
+EVENTS_STRAINER = SoupStrainer(class_='rhov')
 
 
 def fetch_upcoming_events() -> List[Dict[str, Any]]:
     """
     Получает предстоящие события с сайта Techmeme.
+    Результат кэшируется на EVENTS_CACHE_TTL секунд.
 
     Returns:
         List[Dict[str, Any]]: Список словарей с информацией о событиях.
     """
+    if time.time() - _events_cache['time'] < EVENTS_CACHE_TTL:
+        return _events_cache['events']
+
     events = []
     try:
         response = requests.get(TECHMEME_EVENTS_URL, timeout=10)
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
+        soup = BeautifulSoup(response.content, 'lxml', parse_only=EVENTS_STRAINER)
 
-        event_elements = soup.select('.rhov')
+        event_elements = soup.find_all(class_='rhov')
 
         for event in event_elements:
             try:
+                # Дата, название и место проведения; div могут быть вложены в ссылку события
                 div_elements = event.find_all('div')
                 if len(div_elements) >= 3:
                     date_str = div_elements[0].text.strip()
@@ -53,6 +69,8 @@ def fetch_upcoming_events() -> List[Dict[str, Any]]:
                 logger.error(f"Ошибка при обработке события: {e}")
 
         logger.info(f"Получено {len(events)} предстоящих событий")
+        _events_cache['time'] = time.time()
+        _events_cache['events'] = events
     except Exception as e:
         logger.error(f"Ошибка при получении событий с {TECHMEME_EVENTS_URL}: {e}")
 
@@ -64,14 +82,13 @@ def update_events():
     logger.info("Начало обновления базы данных событий")
 
     # Очистка старых событий
-    clear_old_data(days=1)  # Удаляем события, которые уже прошли
+    clear_old_events(days=1)  # Удаляем события, которые уже прошли
 
     # Получение новых событий
     new_events = fetch_upcoming_events()
 
-    # Добавление новых событий в базу данных
-    for event in new_events:
-        add_event(event['name'], event['date'], event['keywords'])
+    # Добавление новых событий в базу данных одной транзакцией
+    add_events_bulk([(event['name'], event['date'], event['keywords']) for event in new_events])
 
     logger.info("Обновление базы данных событий завершено")
 
@@ -86,18 +103,35 @@ def get_relevant_events(article_content: str) -> List[Dict[str, Any]]:
     Returns:
         List[Dict[str, Any]]: Список релевантных событий.
     """
-    today_events = get_today_events()
-    relevant_events = []
+    today_events = get_today_events_cached()
 
-    for event in today_events:
-        event_keywords = event[3].split(',')
-        if any(keyword.lower() in article_content.lower() for keyword in event_keywords):
-            relevant_events.append({
-                'id': event[0],
-                'name': event[1],
-                'date': event[2],
-                'keywords': event_keywords
-            })
+    # Ключевое слово -> индексы событий, в которых оно встречается
+    keyword_events = {}
+    for i, event in enumerate(today_events):
+        for keyword in event[3].lower().split(','):
+            if keyword:
+                keyword_events.setdefault(keyword, []).append(i)
+
+    if not keyword_events:
+        return []
+
+    # Одно регулярное выражение по всем ключевым словам; длинные слова проверяются первыми
+    keywords = sorted(keyword_events, key=len, reverse=True)
+    pattern = re.compile(r'\b(' + '|'.join(re.escape(keyword) for keyword in keywords) + r')\b')
+
+    matched_events = set()
+    for keyword in set(pattern.findall(article_content.lower())):
+        matched_events.update(keyword_events[keyword])
+
+    relevant_events = []
+    for i in sorted(matched_events):
+        event = today_events[i]
+        relevant_events.append({
+            'id': event[0],
+            'name': event[1],
+            'date': event[2],
+            'keywords': event[3].split(',')
+        })
 
     return relevant_events
 
@@ -126,6 +160,12 @@ def generate_events_digest() -> str:
     return digest
 
 
+@ttl_cache(DIGEST_CACHE_TTL)
+def get_events_digest_cached() -> str:
+    """Возвращает дайджест событий с кэшированием на DIGEST_CACHE_TTL секунд."""
+    return generate_events_digest()
+
+
 if __name__ == "__main__":
     # Тестовый код для проверки работы модуля
     logging.basicConfig(level=logging.INFO)
@@ -3,12 +3,17 @@ from typing import Dict, Any, Optional
 import telebot
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
 from datetime import datetime
-from .database import add_published_article, log_post_stats
+from .database import log_post_stats, record_publication
 from .utils import escape_html
 from config import TELEGRAM_CHANNEL_ID, category_emoji
 
 logger = logging.getLogger(__name__)
 
+FORMAT_CACHE_SIZE = 512  # Максимальное количество отформатированных сообщений в кэше
+
+# Кэш отформатированных сообщений по id статьи
+_fmt_cache: Dict[str, str] = {}
+
 
 def publish_to_telegram(bot: telebot.TeleBot, article: Dict[str, Any], channel_id: str = TELEGRAM_CHANNEL_ID) -> \
 Optional[int]:
@@ -35,11 +40,8 @@ Optional[int]:
 
         logger.info(f"Статья успешно опубликована: {article['title']}")
 
-        # Логируем статистику поста
-        log_post_stats(result.message_id, datetime.now())
-
-        # Добавляем статью в базу данных опубликованных
-        add_published_article(article['id'], article['title'], datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        # Сохраняем статью; статистика поста записывается фоновым потоком
+        record_publication(article['id'], article['title'], result.message_id, datetime.now())
 
         return result.message_id
     except Exception as e:
@@ -57,6 +59,10 @@ def format_message(article: Dict[str, Any]) -> str:
     Returns:
         str: Отформатированное сообщение.
     """
+    cached = _fmt_cache.get(article['id'])
+    if cached is not None:
+        return cached
+
     emoji_for_category: str = category_emoji.get(article['category'], "🧪")
     category_tag = f"#{article['category'].upper()}"
 
@@ -65,6 +71,11 @@ def format_message(article: Dict[str, Any]) -> str:
     message += f"{escape_html(article['summary'])}\n\n"
     message += f"<a href='{article['link']}'>Читать полностью</a>"
 
+    if len(_fmt_cache) >= FORMAT_CACHE_SIZE:
+        # Вытесняем самую старую запись, словарь сохраняет порядок добавления
+        del _fmt_cache[next(iter(_fmt_cache))]
+    _fmt_cache[article['id']] = message
+
     return message
 
 
@@ -1,14 +1,29 @@
 import feedparser
 import requests
 import logging
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from config import RSS_FEEDS, ARTICLES_PER_FEED
 from .database import is_article_published
-from .utils import clean_html, remove_img_tags
+from .utils import clean_html
 
 logger = logging.getLogger(__name__)
 
+MAX_FEED_WORKERS = 16  # Максимальное количество одновременно загружаемых фидов
+
+# Общая сессия с пулом соединений для загрузки фидов из нескольких потоков
+session = requests.Session()
+session.headers['User-Agent'] = feedparser.USER_AGENT
+_adapter = HTTPAdapter(pool_connections=MAX_FEED_WORKERS, pool_maxsize=MAX_FEED_WORKERS)
+session.mount('http://', _adapter)
+session.mount('https://', _adapter)
+
+# ETag, Last-Modified и записи последнего ответа каждого фида для условных запросов.
+# Записи нужны, чтобы при ответе 304 снова предложить еще не опубликованные статьи
+_feed_meta: Dict[str, Tuple[Optional[str], Optional[str], List[feedparser.FeedParserDict]]] = {}
+
 
 def fetch_articles() -> List[Dict[str, Any]]:
     """
@@ -17,13 +32,21 @@ def fetch_articles() -> List[Dict[str, Any]]:
     Returns:
         List[Dict[str, Any]]: Список словарей, каждый из которых представляет статью.
     """
+    # Фиды загружаются параллельно, так как время уходит в основном на ожидание сети
+    feed_articles = {}
+    with ThreadPoolExecutor(max_workers=max(min(MAX_FEED_WORKERS, len(RSS_FEEDS)), 1)) as executor:
+        futures = {executor.submit(fetch_feed, feed_url): feed_url for feed_url in RSS_FEEDS}
+        for future in as_completed(futures):
+            feed_url = futures[future]
+            try:
+                feed_articles[feed_url] = future.result()
+            except Exception as e:
+                logger.error(f"Ошибка при получении статей из {feed_url}: {e}")
+
+    # Сохраняем порядок фидов из конфигурации
     articles = []
     for feed_url in RSS_FEEDS:
-        try:
-            feed_articles = fetch_feed(feed_url)
-            articles.extend(feed_articles)
-        except Exception as e:
-            logger.error(f"Ошибка при получении статей из {feed_url}: {e}")
+        articles.extend(feed_articles.get(feed_url, []))
 
     logger.info(f"Всего получено {len(articles)} статей")
     return articles
@@ -41,16 +64,36 @@ def fetch_feed(feed_url: str) -> List[Dict[str, Any]]:
     """
     logger.info(f"Получение статей из {feed_url}")
 
-    feed = feedparser.parse(feed_url)
+    # Условный запрос: если фид не изменился, сервер вернет 304 без тела
+    headers = {}
+    etag, last_modified, entries = _feed_meta.get(feed_url, (None, None, []))
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+
+    response = session.get(feed_url, headers=headers, timeout=10)
+    if response.status_code == 304:
+        # Фид не изменился: повторно разбираем сохраненные записи, опубликованные parse_entry отбросит
+        logger.info(f"Фид {feed_url} не изменился")
+    else:
+        response.raise_for_status()
 
-    if feed.bozo:
-        logger.warning(f"Ошибка при парсинге {feed_url}: {feed.bozo_exception}")
+        # Заголовки ответа нужны feedparser для определения кодировки и базового URL относительных ссылок;
+        # он ищет их в нижнем регистре
+        response_headers = {key.lower(): value for key, value in response.headers.items()}
+        response_headers['content-location'] = response.url
+        feed = feedparser.parse(response.content, response_headers=response_headers)
 
-    articles = []
-    for entry in feed.entries[:ARTICLES_PER_FEED]:
-        article = parse_entry(entry, feed_url)
-        if article and not is_article_published(article['id']):
-            articles.append(article)
+        if feed.bozo:
+            logger.warning(f"Ошибка при парсинге {feed_url}: {feed.bozo_exception}")
+
+        entries = feed.entries[:ARTICLES_PER_FEED]
+        _feed_meta[feed_url] = (response.headers.get('ETag'), response.headers.get('Last-Modified'), entries)
+
+    # Уже опубликованные статьи parse_entry отбрасывает до разбора содержимого
+    parsed = [parse_entry(entry, feed_url) for entry in entries]
+    articles = [article for article in parsed if article]
 
     logger.info(f"Получено {len(articles)} новых статей из {feed_url}")
     return articles
@@ -65,12 +108,17 @@ def parse_entry(entry: feedparser.FeedParserDict, feed_url: str) -> Dict[str, An
         feed_url (str): URL RSS-фида.
 
     Returns:
-        Dict[str, Any]: Словарь, представляющий статью, или None, если статья не валидна.
+        Dict[str, Any]: Словарь, представляющий статью, или None, если статья не валидна
+        или уже опубликована.
     """
     try:
         article_id = entry.get('id', entry.link)
+        if is_article_published(article_id):
+            return None
+
         title = clean_html(entry.title)
-        summary = clean_html(remove_img_tags(entry.summary)) if 'summary' in entry else ''
+        # clean_html разбирает разметку целиком, поэтому теги изображений отдельно не удаляем
+        summary = clean_html(entry.summary) if 'summary' in entry else ''
 
         # Получаем дату публикации
         pub_date = entry.get('published_parsed') or entry.get('updated_parsed')
@@ -1,34 +1,58 @@
 import logging
+import queue
+import threading
+import time
+from functools import wraps
 from telebot import TeleBot
 from telebot.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton, BotCommand
 from telebot.apihelper import ApiTelegramException
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable, Union
 from .database import get_post_stats, get_top_articles, get_last_publication_time, get_publications_in_last_hour
-from .events import generate_events_digest
+from .events import get_events_digest_cached
 from .publisher import publish_digest
 from .article_processor import get_article_scores, process_articles
 from .rss_parser import fetch_articles
+from .utils import ttl_cache
 from config import ADMIN_CHAT_ID
 
 logger = logging.getLogger(__name__)
 
+ADMIN_ID = int(ADMIN_CHAT_ID)
+
+MAX_MESSAGE_LENGTH = 4000  # Лимит Telegram 4096 символов, оставляем небольшой запас
+STATUS_CACHE_TTL = 30  # Время жизни данных для /status в секундах
+SEND_RATE_LIMIT = 28  # Сообщений в секунду через очередь отправки, с запасом до лимита Telegram в 30
+SCORES_MAX_AGE = 300  # Статьи из цикла публикации моложе этого возраста (в секундах) используются в /scores
+
+# Заголовок и формат строки таблицы /scores
+SCORES_HEADER = (f"{'Заголовок':<50} | {'Общ.':<5} | {'Настр.':<6} | {'Соб.':<4} | {'Врем.':<5} | {'Ист.':<4} | {'Кат.':<4}\n"
+                 + "-" * 90 + "\n")
+SCORES_ROW_FORMAT = ("{title:<50} | {total_score:<5.2f} | {sentiment:<6.2f} | {event_relevance:<4d} | "
+                     "{time_relevance:<5d} | {source_priority:<4d} | {category_weight:<4.2f}\n").format_map
+
+# Очередь исходящих сообщений, которую разбирает единственный поток отправки
+_send_queue: queue.Queue = queue.Queue()
+_sender: Optional[threading.Thread] = None
+_sender_lock = threading.Lock()
+
+BOT_COMMANDS = [
+    BotCommand("start", "Начать работу с ботом"),
+    BotCommand("help", "Показать справку"),
+    BotCommand("status", "Проверить статус бота"),
+    BotCommand("stats", "Показать статистику публикаций"),
+    BotCommand("top", "Показать топ статей"),
+    BotCommand("events", "Показать предстоящие события"),
+    BotCommand("pause", "Приостановить публикации"),
+    BotCommand("resume", "Возобновить публикации"),
+    BotCommand("scores", "Показать таблицу оценок статей"),
+    BotCommand("optimal_time", "Показать оптимальное время публикаций")
+]
+
 
 def setup_bot_commands(bot: TeleBot):
     """Устанавливает команды бота."""
-    commands = [
-        BotCommand("start", "Начать работу с ботом"),
-        BotCommand("help", "Показать справку"),
-        BotCommand("status", "Проверить статус бота"),
-        BotCommand("stats", "Показать статистику публикаций"),
-        BotCommand("top", "Показать топ статей"),
-        BotCommand("events", "Показать предстоящие события"),
-        BotCommand("pause", "Приостановить публикации"),
-        BotCommand("resume", "Возобновить публикации"),
-        BotCommand("scores", "Показать таблицу оценок статей"),
-        BotCommand("optimal_time", "Показать оптимальное время публикаций")
-    ]
-    bot.set_my_commands(commands)
+    bot.set_my_commands(BOT_COMMANDS)
 
 
 def send_initial_message(bot: TeleBot, admin_chat_id: str):
@@ -49,19 +73,133 @@ def send_initial_message(bot: TeleBot, admin_chat_id: str):
     bot.send_message(admin_chat_id, message)
 
 
+@ttl_cache(STATUS_CACHE_TTL)
+def get_last_publication_time_cached() -> Optional[datetime]:
+    """Возвращает время последней публикации с кэшированием на STATUS_CACHE_TTL секунд."""
+    return get_last_publication_time()
+
+
+@ttl_cache(STATUS_CACHE_TTL)
+def get_publications_in_last_hour_cached() -> int:
+    """Возвращает количество публикаций за последний час с кэшированием на STATUS_CACHE_TTL секунд."""
+    return get_publications_in_last_hour()
+
+
+def queue_message(bot: TeleBot, chat_id: int, text: str):
+    """
+    Ставит сообщение в очередь отправки. Сообщения отправляются по порядку
+    с ограничением скорости SEND_RATE_LIMIT сообщений в секунду.
+
+    Args:
+        bot (TeleBot): Инстанс бота Telegram.
+        chat_id (int): ID чата получателя.
+        text (str): Текст сообщения.
+    """
+    start_sender()
+    _send_queue.put((bot, chat_id, text))
+
+
+def start_sender():
+    """Запускает фоновый поток отправки сообщений, если он еще не запущен."""
+    global _sender
+    with _sender_lock:
+        if _sender is None or not _sender.is_alive():
+            _sender = threading.Thread(target=sender_loop, name='telegram-sender', daemon=True)
+            _sender.start()
+
+
+def sender_loop():
+    """Отправляет сообщения из очереди, ограничивая скорость алгоритмом token bucket."""
+    tokens = float(SEND_RATE_LIMIT)
+    last_refill = time.monotonic()
+    while True:
+        bot, chat_id, text = _send_queue.get()
+
+        now = time.monotonic()
+        tokens = min(SEND_RATE_LIMIT, tokens + (now - last_refill) * SEND_RATE_LIMIT)
+        last_refill = now
+        if tokens < 1:
+            # Ждем, пока накопится токен на одно сообщение
+            time.sleep((1 - tokens) / SEND_RATE_LIMIT)
+            tokens = 1.0
+            last_refill = time.monotonic()
+        tokens -= 1
+
+        try:
+            bot.send_message(chat_id, text)
+        except ApiTelegramException as e:
+            logger.error(f"Ошибка при отправке сообщения в чат {chat_id}: {e}")
+        except Exception as e:
+            logger.error(f"Непредвиденная ошибка при отправке сообщения в чат {chat_id}: {e}")
+        finally:
+            _send_queue.task_done()
+
+
+def pack_lines(lines: List[str], limit: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    """
+    Жадно объединяет строки в сообщения, длина каждого из которых не превышает лимит.
+
+    Args:
+        lines (List[str]): Строки сообщения, каждая с завершающим переводом строки.
+        limit (int): Максимальная длина одного сообщения.
+
+    Returns:
+        List[str]: Готовые к отправке сообщения.
+    """
+    messages = []
+    parts = []
+    length = 0
+    for line in lines:
+        if parts and length + len(line) > limit:
+            messages.append(''.join(parts))
+            parts = []
+            length = 0
+        parts.append(line)
+        length += len(line)
+    if parts:
+        messages.append(''.join(parts))
+    return messages
+
+
+def admin_only(bot: TeleBot) -> Callable[[Callable], Callable]:
+    """
+    Возвращает декоратор обработчиков, выполняющий их только для администратора.
+    Остальным пользователям отправляется сообщение об отсутствии прав.
+
+    Args:
+        bot (TeleBot): Инстанс бота Telegram.
+
+    Returns:
+        Callable: Декоратор для обработчиков сообщений и callback-запросов.
+    """
+    def decorator(handler: Callable) -> Callable:
+        @wraps(handler)
+        def wrapper(update: Union[Message, CallbackQuery]):
+            if isinstance(update, CallbackQuery):
+                if update.message.chat.id != ADMIN_ID:
+                    bot.answer_callback_query(update.id, "У вас нет прав для выполнения этой команды.")
+                    return
+            elif update.chat.id != ADMIN_ID:
+                bot.reply_to(update, "У вас нет прав для выполнения этой команды.")
+                return
+            return handler(update)
+
+        return wrapper
+
+    return decorator
+
+
 def register_handlers(bot: TeleBot):
     """Регистрирует обработчики команд и сообщений."""
+    admin = admin_only(bot)
 
     @bot.message_handler(commands=['start', 'help'])
     def send_welcome(message: Message):
         bot.reply_to(message, "Привет! Я бот для публикации новостей. Используй /help для получения списка команд.")
 
     @bot.message_handler(commands=['status'])
+    @admin
     def send_status(message: Message):
-        if str(message.chat.id) != ADMIN_CHAT_ID:
-            bot.reply_to(message, "У вас нет прав для выполнения этой команды.")
-            return
-
         newsbot = bot.newsbot
         status = "🤖 Статус бота:\n\n"
 
@@ -71,78 +209,51 @@ def register_handlers(bot: TeleBot):
         else:
             status += "✅ Бот активен и публикует новости\n"
 
-        last_publication = get_last_publication_time()
+        last_publication = get_last_publication_time_cached()
         if last_publication:
             status += f"🕒 Последняя публикация: {last_publication.strftime('%Y-%m-%d %H:%M:%S')}\n"
         else:
             status += "🕒 Публикаций еще не было\n"
 
-        publications_last_hour = get_publications_in_last_hour()
+        publications_last_hour = get_publications_in_last_hour_cached()
         status += f"📊 Публикаций за последний час: {publications_last_hour}\n"
 
         bot.reply_to(message, status)
 
     @bot.message_handler(commands=['stats'])
+    @admin
     def send_stats(message: Message):
-        if str(message.chat.id) != ADMIN_CHAT_ID:
-            bot.reply_to(message, "У вас нет прав для выполнения этой команды.")
-            return
         stats = get_post_stats(7)  # Статистика за последнюю неделю
-        response = "📊 Статистика публикаций за последнюю неделю:\n\n"
-
-        # Разделяем статистику на части
-        chunk_size = 50  # Количество записей в одном сообщении
-        for i in range(0, len(stats), chunk_size):
-            chunk = stats[i:i + chunk_size]
-            chunk_response = response if i == 0 else ""  # Добавляем заголовок только к первому сообщению
-            for stat in chunk:
-                chunk_response += f"ID: {stat[0]}, Время: {stat[1]}, Просмотры: {stat[2]}, Репосты: {stat[3]}, Реакции: {stat[4]}\n"
-
-            try:
-                bot.reply_to(message, chunk_response)
-            except ApiTelegramException as e:
-                if "message is too long" in str(e):
-                    # Если сообщение все еще слишком длинное, разделим его на еще меньшие части
-                    lines = chunk_response.split('\n')
-                    sub_chunk = ""
-                    for line in lines:
-                        if len(sub_chunk) + len(line) > 4000:  # Оставляем небольшой запас
-                            bot.reply_to(message, sub_chunk)
-                            sub_chunk = line + "\n"
-                        else:
-                            sub_chunk += line + "\n"
-                    if sub_chunk:
-                        bot.reply_to(message, sub_chunk)
-                else:
-                    # Если возникла другая ошибка, просто логируем её
-                    logger.error(f"Ошибка при отправке статистики: {e}")
-
-        bot.reply_to(message, "Статистика отправлена.")
+        lines = ["📊 Статистика публикаций за последнюю неделю:\n\n"]
+        lines.extend(f"ID: {stat[0]}, Время: {stat[1]}, Просмотры: {stat[2]}, Репосты: {stat[3]}, Реакции: {stat[4]}\n"
+                     for stat in stats)
+
+        # Разбиваем статистику на сообщения по длине заранее, не дожидаясь ошибки от Telegram,
+        # и отправляем через очередь, чтобы не превысить лимит сообщений в секунду
+        for chunk_response in pack_lines(lines):
+            queue_message(bot, message.chat.id, chunk_response)
+
+        queue_message(bot, message.chat.id, "Статистика отправлена.")
 
     @bot.message_handler(commands=['top'])
+    @admin
     def send_top_articles(message: Message):
-        if str(message.chat.id) != ADMIN_CHAT_ID:
-            bot.reply_to(message, "У вас нет прав для выполнения этой команды.")
-            return
         top_articles = get_top_articles(5)  # Топ-5 статей
-        response = "🏆 Топ-5 статей:\n\n"
-        for article in top_articles:
-            response += f"Заголовок: {article[0]}\nДата: {article[1]}\nПросмотры: {article[2]}, Репосты: {article[3]}, Реакции: {article[4]}\n\n"
-        bot.reply_to(message, response)
+        parts = ["🏆 Топ-5 статей:\n\n"]
+        parts.extend(
+            f"Заголовок: {article[0]}\nДата: {article[1]}\nПросмотры: {article[2]}, Репосты: {article[3]}, Реакции: {article[4]}\n\n"
+            for article in top_articles)
+        bot.reply_to(message, ''.join(parts))
 
     @bot.message_handler(commands=['events'])
+    @admin
     def send_events(message: Message):
-        if str(message.chat.id) != ADMIN_CHAT_ID:
-            bot.reply_to(message, "У вас нет прав для выполнения этой команды.")
-            return
-        events_digest = generate_events_digest()
+        events_digest = get_events_digest_cached()
         bot.reply_to(message, events_digest, parse_mode='HTML')
 
     @bot.message_handler(commands=['pause'])
+    @admin
     def pause_publications(message: Message):
-        if str(message.chat.id) != ADMIN_CHAT_ID:
-            bot.reply_to(message, "У вас нет прав для выполнения этой команды.")
-            return
         keyboard = InlineKeyboardMarkup()
         keyboard.row(InlineKeyboardButton("1 час", callback_data="pause_1"),
                      InlineKeyboardButton("2 часа", callback_data="pause_2"),
@@ -150,18 +261,14 @@ def register_handlers(bot: TeleBot):
         bot.reply_to(message, "На сколько часов приостановить публикации?", reply_markup=keyboard)
 
     @bot.message_handler(commands=['resume'])
+    @admin
     def resume_publications(message: Message):
-        if str(message.chat.id) != ADMIN_CHAT_ID:
-            bot.reply_to(message, "У вас нет прав для выполнения этой команды.")
-            return
         bot.newsbot.resume_publications()
         bot.reply_to(message, "Публикации возобновлены.")
 
     @bot.callback_query_handler(func=lambda call: call.data.startswith('pause_'))
+    @admin
     def callback_pause(call: CallbackQuery):
-        if str(call.message.chat.id) != ADMIN_CHAT_ID:
-            bot.answer_callback_query(call.id, "У вас нет прав для выполнения этой команды.")
-            return
         hours = int(call.data.split('_')[1])
         bot.newsbot.pause_publications(hours)
         bot.answer_callback_query(call.id, f"Публикации приостановлены на {hours} час(а/ов).")
@@ -170,45 +277,38 @@ def register_handlers(bot: TeleBot):
             call.message.chat.id, call.message.message_id)
 
     @bot.message_handler(commands=['scores'])
+    @admin
     def send_article_scores(message: Message):
-        if str(message.chat.id) != ADMIN_CHAT_ID:
-            bot.reply_to(message, "У вас нет прав для выполнения этой команды.")
-            return
-
-        bot.reply_to(message, "Подготовка таблицы оценок статей...")
+        newsbot = bot.newsbot
+        if newsbot.last_processed_at and (datetime.now() - newsbot.last_processed_at).total_seconds() < SCORES_MAX_AGE:
+            # Статьи из последнего цикла публикации еще свежие, повторно фиды не загружаем
+            processed_articles = newsbot.last_processed_articles
+        else:
+            bot.reply_to(message, "Подготовка таблицы оценок статей...")
 
-        articles = fetch_articles()
-        processed_articles = process_articles(articles)
+            articles = fetch_articles()
+            processed_articles = process_articles(articles)
+            newsbot.last_processed_articles = processed_articles
+            newsbot.last_processed_at = datetime.now()
         scored_articles = get_article_scores(processed_articles)
 
-        table = "🏆 Таблица оценок статей:\n\n"
-        table += "<pre>"
-        table += f"{'Заголовок':<50} | {'Общ.':<5} | {'Настр.':<6} | {'Соб.':<4} | {'Врем.':<5} | {'Ист.':<4} | {'Кат.':<4}\n"
-        table += "-" * 90 + "\n"
-
-        for article in scored_articles[:10]:  # Показываем топ-10 статей
-            table += f"{article['title']:<50} | {article['total_score']:<5.2f} | {article['sentiment']:<6.2f} | {article['event_relevance']:<4d} | {article['time_relevance']:<5d} | {article['source_priority']:<4d} | {article['category_weight']:<4.2f}\n"
+        parts = ["🏆 Таблица оценок статей:\n\n", "<pre>", SCORES_HEADER]
+        parts.extend(SCORES_ROW_FORMAT(article) for article in scored_articles[:10])  # Показываем топ-10 статей
+        parts.append("</pre>")
 
-        table += "</pre>"
-
-        bot.reply_to(message, table, parse_mode='HTML')
+        bot.reply_to(message, ''.join(parts), parse_mode='HTML')
 
     @bot.message_handler(commands=['optimal_time'])
+    @admin
     def send_optimal_time(message: Message):
-        if str(message.chat.id) != ADMIN_CHAT_ID:
-            bot.reply_to(message, "У вас нет прав для выполнения этой команды.")
-            return
-
         newsbot = bot.newsbot
         optimal_hours = sorted(newsbot.analyze_optimal_publishing_time())
 
-        response = "🕰 Оптимальное время для публикаций:\n\n"
-        for hour in optimal_hours:
-            response += f"• {hour:02d}:00 - {(hour + 1) % 24:02d}:00\n"
-
-        response += "\nЭти данные основаны на анализе вовлеченности аудитории за последние 30 дней."
+        parts = ["🕰 Оптимальное время для публикаций:\n\n"]
+        parts.extend(f"• {hour:02d}:00 - {(hour + 1) % 24:02d}:00\n" for hour in optimal_hours)
+        parts.append("\nЭти данные основаны на анализе вовлеченности аудитории по часам публикации.")
 
-        bot.reply_to(message, response)
+        bot.reply_to(message, ''.join(parts))
 
 
     @bot.message_handler(func=lambda message: True)
@@ -219,7 +319,7 @@ def register_handlers(bot: TeleBot):
 
 def create_digest_and_publish(bot: TeleBot):
     """Создает и публикует дайджест событий."""
-    digest = generate_events_digest()
+    digest = get_events_digest_cached()
     publish_digest(bot, digest)
 
 
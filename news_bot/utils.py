@@ -1,13 +1,23 @@
 import re
 import logging
-from typing import Optional
+import threading
+import time
+from functools import lru_cache, wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from html import escape
+from urllib.parse import urlsplit
+from lxml import etree, html
 from googletrans import Translator
 from config import TARGET_LANGUAGE
 
 logger = logging.getLogger(__name__)
 
-translator = Translator()
+# Клиенты googletrans, по одному на поток: у каждого своя HTTP-сессия
+_translators = threading.local()
+
+HTML_TAG_RE = re.compile('<.*?>')  # Запасной вариант для текста, который не удалось разобрать парсером
+URL_SCHEMES = frozenset({'http', 'https', 'ftp', 'ftps'})
+MARKDOWN_ESCAPE_TABLE = str.maketrans({char: '\\' + char for char in r'_*[]()~`>#+-=|{}.!'})
 
 
 def setup_logging():
@@ -25,9 +35,10 @@ def setup_logging():
     logging.getLogger('telebot').setLevel(logging.WARNING)
 
 
+@lru_cache(maxsize=2048)
 def clean_html(raw_html: str) -> str:
     """
-    Очищает HTML-теги из текста.
+    Очищает HTML-теги из текста, декодируя HTML-сущности и отбрасывая содержимое <script> и <style>.
 
     Args:
         raw_html (str): Исходный текст с HTML-тегами.
@@ -35,22 +46,49 @@ def clean_html(raw_html: str) -> str:
     Returns:
         str: Очищенный текст.
     """
-    cleanr = re.compile('<.*?>')
-    cleantext = re.sub(cleanr, '', raw_html)
-    return cleantext.strip()
+    if '<' not in raw_html and '&' not in raw_html:
+        # Обычный текст (чаще всего заголовки) не требует разбора
+        return raw_html.strip()
+    try:
+        # Разбор выполняет libxml2, без посимвольного перебора регулярным выражением
+        fragment = html.fragment_fromstring(raw_html, create_parent='div')
+        etree.strip_elements(fragment, 'script', 'style', with_tail=False)
+        return fragment.text_content().strip()
+    except (etree.ParserError, ValueError) as e:
+        logger.warning(f"Не удалось разобрать HTML, теги удаляются регулярным выражением: {e}")
+        return HTML_TAG_RE.sub('', raw_html).strip()
 
 
-def remove_img_tags(text: str) -> str:
+def ttl_cache(ttl: float) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
     """
-    Удаляет теги изображений из текста.
+    Декоратор, кэширующий результаты функции на ttl секунд. Аргументы функции должны быть хэшируемыми.
 
     Args:
-        text (str): Исходный текст с тегами изображений.
+        ttl (float): Время жизни закэшированного результата в секундах.
 
     Returns:
-        str: Текст без тегов изображений.
+        Callable: Декоратор.
     """
-    return re.sub(r'<img[^>]*>', '', text)
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        cache: Dict[Tuple, Tuple[float, Any]] = {}
+        lock = threading.Lock()
+
+        @wraps(func)
+        def wrapper(*args):
+            now = time.monotonic()
+            with lock:
+                entry = cache.get(args)
+            if entry is not None and now - entry[0] < ttl:
+                return entry[1]
+            result = func(*args)
+            with lock:
+                cache[args] = (now, result)
+            return result
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator
 
 
 def truncate_summary(summary: str, max_length: int = 200) -> str:
@@ -73,9 +111,18 @@ def truncate_summary(summary: str, max_length: int = 200) -> str:
     return truncated + '...'
 
 
+def get_translator() -> Translator:
+    """Возвращает клиент googletrans для текущего потока, создавая его при первом обращении."""
+    translator = getattr(_translators, 'translator', None)
+    if translator is None:
+        translator = Translator()
+        _translators.translator = translator
+    return translator
+
+
 def translate_text(text: str, target_language: str = TARGET_LANGUAGE) -> str:
     """
-    Переводит текст на целевой язык.
+    Переводит текст на целевой язык. Повторные запросы того же текста берутся из кэша.
 
     Args:
         text (str): Исходный текст.
@@ -85,12 +132,44 @@ def translate_text(text: str, target_language: str = TARGET_LANGUAGE) -> str:
         str: Переведенный текст.
     """
     try:
-        return translator.translate(text, dest=target_language).text
+        return translate_cached(text, target_language)
     except Exception as e:
         logger.error(f"Ошибка при переводе текста: {e}")
         return text
 
 
+def translate_texts(texts: List[str], target_language: str = TARGET_LANGUAGE) -> List[Optional[str]]:
+    """
+    Переводит список текстов на целевой язык одним запросом.
+
+    Args:
+        texts (List[str]): Исходные тексты.
+        target_language (str): Код целевого языка.
+
+    Returns:
+        List[Optional[str]]: Переведенные тексты в том же порядке; None для текстов, которые не удалось перевести.
+    """
+    try:
+        return [result.text for result in get_translator().translate(texts, dest=target_language)]
+    except Exception as e:
+        logger.error(f"Ошибка при пакетном переводе текстов: {e}")
+        # Переводим тексты по одному, чтобы ошибка в одном тексте не помешала переводу остальных
+        translations = []
+        for text in texts:
+            try:
+                translations.append(translate_cached(text, target_language))
+            except Exception as e:
+                logger.error(f"Ошибка при переводе текста: {e}")
+                translations.append(None)
+        return translations
+
+
+@lru_cache(maxsize=4096)
+def translate_cached(text: str, target_language: str) -> str:
+    """Переводит текст через googletrans; ошибки не кэшируются и передаются вызывающему коду."""
+    return get_translator().translate(text, dest=target_language).text
+
+
 def escape_markdown(text: str) -> str:
     """
     Экранирует специальные символы для Markdown.
@@ -101,8 +180,7 @@ def escape_markdown(text: str) -> str:
     Returns:
         str: Текст с экранированными специальными символами.
     """
-    escape_chars = r'_*[]()~`>#+-=|{}.!'
-    return re.sub(f'([{re.escape(escape_chars)}])', r'\\\1', text)
+    return text.translate(MARKDOWN_ESCAPE_TABLE)
 
 
 def escape_html(text: str) -> str:
@@ -146,14 +224,11 @@ def is_valid_url(url: str) -> bool:
     Returns:
         bool: True, если строка является действительным URL, иначе False.
     """
-    regex = re.compile(
-        r'^(?:http|ftp)s?://'  # http:// or https://
-        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|'  # domain...
-        r'localhost|'  # localhost...
-        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
-        r'(?::\d+)?'  # optional port
-        r'(?:/?|[/?]\S+)$', re.IGNORECASE)
-    return re.match(regex, url) is not None
+    try:
+        parts = urlsplit(url)
+        return parts.scheme in URL_SCHEMES and bool(parts.hostname)
+    except ValueError:
+        return False
 
 
 def extract_domain(url: str) -> Optional[str]:
@@ -168,8 +243,8 @@ def extract_domain(url: str) -> Optional[str]:
     """
     if not is_valid_url(url):
         return None
-    domain = re.findall(r'://(?:www\.)?([\w\-\.]+)/', url)
-    return domain[0] if domain else None
+    hostname = urlsplit(url).hostname
+    return hostname[4:] if hostname.startswith('www.') else hostname
 
 
 if __name__ == "__main__":